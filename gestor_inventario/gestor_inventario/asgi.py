@@ -3,14 +3,28 @@ ASGI config for gestor_inventario project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project with an ASGI server to get live stock updates on the product
+list (server-sent events at /productos/eventos/), e.g.:
+
+    uvicorn gestor_inventario.asgi:application --host 127.0.0.1 --port 8000
+
+Under ``runserver``/WSGI the page works the same but without live updates.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gestor_inventario.settings')
 
 application = get_asgi_application()
+
+if settings.DEBUG:
+    # runserver sirve los estáticos por su cuenta; uvicorn no.
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+
+    application = ASGIStaticFilesHandler(application)
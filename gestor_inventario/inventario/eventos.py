@@ -0,0 +1,55 @@
+# inventario/eventos.py
+import asyncio
+import json
+import threading
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class CanalProductos:
+    """Pub/sub en memoria para avisar a los navegadores conectados de cambios en productos.
+
+    Cada conexión SSE tiene su propia cola dentro del event loop del servidor ASGI. Las vistas
+    síncronas publican desde otro hilo, por eso la entrega pasa por call_soon_threadsafe().
+    El canal es por proceso: con varios workers, cada uno solo ve sus propios cambios.
+    """
+
+    TAMANO_COLA = 100
+
+    def __init__(self):
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+
+    def suscribir(self):
+        suscriptor = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.TAMANO_COLA))
+        with self._lock:
+            self._suscriptores.add(suscriptor)
+        return suscriptor
+
+    def desuscribir(self, suscriptor):
+        with self._lock:
+            self._suscriptores.discard(suscriptor)
+
+    def publicar(self, tipo, datos=None):
+        mensaje = f"event: {tipo}\ndata: {json.dumps(datos or {}, cls=DjangoJSONEncoder)}\n\n"
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for loop, cola in suscriptores:
+            try:
+                loop.call_soon_threadsafe(self._entregar, cola, mensaje)
+            except RuntimeError:
+                # El loop ya se cerró; la conexión se limpiará sola.
+                pass
+
+    @staticmethod
+    def _entregar(cola, mensaje):
+        try:
+            cola.put_nowait(mensaje)
+        except asyncio.QueueFull:
+            # Cliente demasiado lento: se descartan los cambios pendientes y se le pide recargar.
+            while not cola.empty():
+                cola.get_nowait()
+            cola.put_nowait("event: recargar\ndata: {}\n\n")
+
+
+canal_productos = CanalProductos()
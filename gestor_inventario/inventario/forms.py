@@ -1,5 +1,7 @@
 # inventario/forms.py
+from decimal import Decimal, InvalidOperation
 from django import forms
+import pandas as pd
 from .models import Producto, Venta
 
 
@@ -98,4 +100,115 @@ class VentaForm(forms.ModelForm):
         producto = self.cleaned_data.get('producto')
         if producto and cantidad > producto.stock:
             raise forms.ValidationError(f"No hay suficiente stock. Stock actual: {producto.stock}")
-        return cantidad
\ No newline at end of file
+        return cantidad
+
+PRECIO_MAXIMO = Decimal('100000000')
+
+
+class ActualizacionMasivaForm(forms.Form):
+    archivo = forms.FileField(
+        required=False,
+        label="Archivo CSV o Excel",
+        help_text="Columnas: id o nombre para identificar el producto; precio_venta, stock y/o nuevo_nombre con los valores nuevos.",
+        widget=forms.ClearableFileInput(attrs={'class': 'mt-1 block w-full text-sm', 'accept': '.csv,.xlsx'})
+    )
+    busqueda = forms.CharField(
+        required=False,
+        label="Productos cuyo nombre contenga",
+        widget=forms.TextInput(attrs={'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-indigo-500 focus:ring-indigo-500 sm:text-sm', 'placeholder': 'Vacío = todos los productos'})
+    )
+    porcentaje = forms.DecimalField(
+        required=False,
+        label="Variación del Precio de Venta (%)",
+        min_value=-100,
+        max_digits=6,
+        decimal_places=2,
+        widget=forms.NumberInput(attrs={'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-indigo-500 focus:ring-indigo-500 sm:text-sm', 'placeholder': 'Ej: 5 o -10'})
+    )
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data.get('archivo')
+        if not archivo:
+            return archivo
+
+        try:
+            if archivo.name.lower().endswith('.xlsx'):
+                df = pd.read_excel(archivo, dtype=str, keep_default_na=False)
+            else:
+                df = pd.read_csv(archivo, dtype=str, keep_default_na=False)
+        except Exception:
+            raise forms.ValidationError("No se pudo leer el archivo. Usa un CSV o un Excel (.xlsx).")
+
+        df.columns = [str(col).strip().lower() for col in df.columns]
+        if 'id' not in df.columns and 'nombre' not in df.columns:
+            raise forms.ValidationError("El archivo debe tener una columna 'id' o 'nombre'.")
+        if not {'precio_venta', 'stock', 'nuevo_nombre'} & set(df.columns):
+            raise forms.ValidationError(
+                "El archivo debe tener al menos una columna 'precio_venta', 'stock' o 'nuevo_nombre'."
+            )
+
+        filas = []
+        errores = []
+        for numero, fila in enumerate(df.to_dict('records'), start=2):
+            try:
+                filas.append(self._parsear_fila(fila))
+            except (ValueError, InvalidOperation):
+                errores.append(numero)
+
+        if errores:
+            muestra = ', '.join(str(n) for n in errores[:10])
+            raise forms.ValidationError(f"Hay valores inválidos en las filas: {muestra}.")
+
+        self.cleaned_data['filas'] = filas
+        return archivo
+
+    @staticmethod
+    def _parsear_fila(fila):
+        id_texto = fila.get('id', '').strip()
+        nombre = fila.get('nombre', '').strip()
+        precio_texto = fila.get('precio_venta', '').strip()
+        stock_texto = fila.get('stock', '').strip()
+        nuevo_nombre = fila.get('nuevo_nombre', '').strip()
+
+        if not id_texto and not nombre:
+            raise ValueError("Fila sin producto")
+
+        precio_venta = Decimal(precio_texto) if precio_texto else None
+        if precio_venta is not None:
+            if not precio_venta.is_finite() or not 0 <= precio_venta < PRECIO_MAXIMO:
+                raise ValueError("Precio inválido")
+            precio_venta = precio_venta.quantize(Decimal('0.01'))
+
+        stock = int(stock_texto) if stock_texto else None
+        if stock is not None and stock < 0:
+            raise ValueError("Stock negativo")
+
+        if len(nuevo_nombre) > 100:
+            raise ValueError("Nombre demasiado largo")
+
+        return {
+            'id': int(id_texto) if id_texto else None,
+            'nombre': nombre,
+            'precio_venta': precio_venta,
+            'stock': stock,
+            'nuevo_nombre': nuevo_nombre or None,
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        archivo = cleaned_data.get('archivo')
+        porcentaje = cleaned_data.get('porcentaje')
+
+        if archivo and porcentaje is not None:
+            raise forms.ValidationError(
+                "Sube un archivo o indica un porcentaje, pero no ambos a la vez.",
+                code='conflicto'
+            )
+
+        if not archivo and porcentaje is None and not self.errors:
+            raise forms.ValidationError(
+                "Debes subir un archivo o indicar un porcentaje de variación.",
+                code='requerido'
+            )
+
+        return cleaned_data
@@ -0,0 +1,222 @@
+# inventario/management/commands/exportar_columnar.py
+import json
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+
+from inventario.models import Producto, Venta, Compra
+
+
+MONEDA = pa.decimal128(10, 2)
+FECHA = pa.timestamp('us', tz='UTC')
+
+# (modelo, columnas de values(), nombres en el archivo, esquema)
+TABLAS = {
+    'productos': (
+        Producto,
+        ['id', 'nombre', 'stock', 'precio_compra', 'precio_venta'],
+        ['id', 'nombre', 'stock', 'costo_promedio', 'precio_venta'],
+        pa.schema([
+            ('id', pa.int64()),
+            ('nombre', pa.string()),
+            ('stock', pa.int64()),
+            ('costo_promedio', MONEDA),
+            ('precio_venta', MONEDA),
+        ]),
+    ),
+    'ventas': (
+        Venta,
+        ['id', 'fecha_venta', 'producto_id', 'producto__nombre', 'cantidad', 'total_venta', 'ganancia', 'cliente'],
+        ['id', 'fecha_venta', 'producto_id', 'producto', 'cantidad', 'total_venta', 'ganancia', 'cliente'],
+        pa.schema([
+            ('id', pa.int64()),
+            ('fecha_venta', FECHA),
+            ('producto_id', pa.int64()),
+            ('producto', pa.string()),
+            ('cantidad', pa.int64()),
+            ('total_venta', MONEDA),
+            ('ganancia', MONEDA),
+            ('cliente', pa.string()),
+        ]),
+    ),
+    'compras': (
+        Compra,
+        ['id', 'fecha_compra', 'producto_id', 'producto__nombre', 'cantidad', 'costo_total'],
+        ['id', 'fecha_compra', 'producto_id', 'producto', 'cantidad', 'costo_total'],
+        pa.schema([
+            ('id', pa.int64()),
+            ('fecha_compra', FECHA),
+            ('producto_id', pa.int64()),
+            ('producto', pa.string()),
+            ('cantidad', pa.int64()),
+            ('costo_total', MONEDA),
+        ]),
+    ),
+}
+
+# Ventas y compras se exportan por tramos a partir del último id exportado. No son de solo
+# inserción: reporte_mensual edita total_venta/ganancia, eliminar_venta borra ventas y borrar
+# un producto borra sus ventas y compras. Por eso la marca de agua guarda también una firma
+# (cantidad de filas y sumas) del tramo ya exportado, y si deja de coincidir el comando se
+# niega a seguir y pide --completo. Los productos se reescriben completos en cada corrida; la
+# columna 'producto' de ventas y compras es el nombre al momento de exportar.
+TABLAS_INCREMENTALES = {
+    'ventas': ['cantidad', 'total_venta', 'ganancia'],
+    'compras': ['cantidad', 'costo_total'],
+}
+
+EXTENSIONES = {'parquet': '.parquet', 'arrow': '.arrow'}
+SUFIJO_TEMPORAL = '.tmp'
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta Productos, Ventas y Compras a archivos columnares (Parquet o Arrow IPC) "
+        "para herramientas de BI. Ventas y Compras se exportan de forma incremental."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('destino', help="Directorio donde se escriben los archivos.")
+        parser.add_argument(
+            '--formato', choices=sorted(EXTENSIONES), default='parquet',
+            help="parquet (comprimido con zstd) o arrow (IPC sin comprimir, para memory-map)."
+        )
+        parser.add_argument(
+            '--tamano-lote', type=int, default=100_000,
+            help="Filas por row group / record batch."
+        )
+        parser.add_argument(
+            '--completo', action='store_true',
+            help="Ignora la marca de agua y vuelve a exportar todo. Necesario cuando se editaron "
+                 "o eliminaron ventas o compras ya exportadas."
+        )
+
+    def handle(self, *args, **options):
+        destino = Path(options['destino'])
+        formato = options['formato']
+        tamano_lote = options['tamano_lote']
+        if tamano_lote < 1:
+            raise CommandError("--tamano-lote debe ser mayor que 0.")
+
+        destino.mkdir(parents=True, exist_ok=True)
+        ruta_marca = destino / 'marca_de_agua.json'
+        marca = {'formato': formato}
+        if ruta_marca.exists() and not options['completo']:
+            marca = json.loads(ruta_marca.read_text())
+            if marca.get('formato') != formato:
+                raise CommandError(
+                    f"{destino} ya contiene una exportación en formato {marca.get('formato')}. "
+                    f"Usa otro directorio o --completo."
+                )
+
+        for tabla in TABLAS_INCREMENTALES:
+            exportado = marca.get(tabla)
+            if exportado and self._firma(tabla, exportado['hasta']) != exportado['firma']:
+                raise CommandError(
+                    f"Hay {tabla} ya exportadas que se editaron o eliminaron desde la última "
+                    f"exportación. Vuelve a exportar con --completo."
+                )
+
+        for tabla in TABLAS:
+            self._borrar_temporales(destino / tabla)
+
+        if options['completo']:
+            for tabla in TABLAS:
+                for archivo in (destino / tabla).glob('*'):
+                    if archivo.suffix in EXTENSIONES.values():
+                        archivo.unlink()
+            self._guardar_marca(ruta_marca, marca)
+
+        filas = self._exportar_tabla(
+            'productos', Producto.objects.all(), destino / 'productos' / f"productos{EXTENSIONES[formato]}",
+            formato, tamano_lote
+        )
+        self.stdout.write(f"productos: {filas} filas")
+
+        for tabla in TABLAS_INCREMENTALES:
+            modelo = TABLAS[tabla][0]
+            desde = marca[tabla]['hasta'] if tabla in marca else 0
+            hasta = modelo.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+            if hasta <= desde:
+                self.stdout.write(f"{tabla}: sin filas nuevas")
+                continue
+
+            # Una corrida interrumpida pudo dejar un tramo escrito sin alcanzar a guardar la
+            # marca de agua; se borra para no duplicar filas.
+            for archivo in (destino / tabla).glob(f"{tabla}-*{EXTENSIONES[formato]}"):
+                inicio = int(archivo.stem.split('-')[1])
+                if inicio > desde:
+                    archivo.unlink()
+
+            queryset = modelo.objects.filter(pk__gt=desde, pk__lte=hasta)
+            ruta = destino / tabla / f"{tabla}-{desde + 1:012d}-{hasta:012d}{EXTENSIONES[formato]}"
+            filas = self._exportar_tabla(tabla, queryset, ruta, formato, tamano_lote)
+            marca[tabla] = {'hasta': hasta, 'firma': self._firma(tabla, hasta)}
+            self._guardar_marca(ruta_marca, marca)
+            self.stdout.write(f"{tabla}: {filas} filas nuevas -> {ruta.name}")
+
+        self.stdout.write(self.style.SUCCESS(f"Exportación lista en {destino}"))
+
+    @staticmethod
+    def _guardar_marca(ruta_marca, marca):
+        ruta_temporal = ruta_marca.with_suffix('.tmp')
+        ruta_temporal.write_text(json.dumps(marca))
+        os.replace(ruta_temporal, ruta_marca)
+
+    @staticmethod
+    def _firma(tabla, hasta):
+        modelo = TABLAS[tabla][0]
+        sumas = {campo: Sum(campo) for campo in TABLAS_INCREMENTALES[tabla]}
+        firma = modelo.objects.filter(pk__lte=hasta).aggregate(filas=Count('pk'), **sumas)
+        return {campo: str(valor) for campo, valor in firma.items()}
+
+    def _exportar_tabla(self, tabla, queryset, ruta, formato, tamano_lote):
+        _, columnas, nombres, esquema = TABLAS[tabla]
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        # Se escribe a un archivo temporal oculto (los lectores de Parquet/Arrow ignoran los
+        # nombres que empiezan con '.') para que nunca vean un archivo a medias.
+        ruta_temporal = ruta.with_name(f".{ruta.name}{SUFIJO_TEMPORAL}")
+
+        total = 0
+        try:
+            if formato == 'parquet':
+                escritor = pq.ParquetWriter(ruta_temporal, esquema, compression='zstd')
+            else:
+                escritor = pa.ipc.new_file(str(ruta_temporal), esquema)
+
+            with escritor:
+                filas = queryset.order_by('pk').values_list(*columnas).iterator(chunk_size=tamano_lote)
+                lote = []
+                for fila in filas:
+                    lote.append(fila)
+                    if len(lote) == tamano_lote:
+                        escritor.write_batch(self._a_batch(lote, nombres, esquema))
+                        total += len(lote)
+                        lote = []
+                if lote or total == 0:
+                    escritor.write_batch(self._a_batch(lote, nombres, esquema))
+                    total += len(lote)
+
+            os.replace(ruta_temporal, ruta)
+        except BaseException:
+            ruta_temporal.unlink(missing_ok=True)
+            raise
+        return total
+
+    @staticmethod
+    def _borrar_temporales(directorio):
+        # Restos de una corrida que se cortó sin alcanzar a limpiar (p. ej. proceso terminado).
+        for archivo in directorio.glob(f".*{SUFIJO_TEMPORAL}"):
+            archivo.unlink()
+
+    @staticmethod
+    def _a_batch(lote, nombres, esquema):
+        columnas = list(zip(*lote)) if lote else [[] for _ in nombres]
+        return pa.RecordBatch.from_arrays(
+            [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, esquema)],
+            schema=esquema
+        )
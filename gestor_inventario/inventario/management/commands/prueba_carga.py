@@ -0,0 +1,336 @@
+# inventario/management/commands/prueba_carga.py
+import http.client
+import http.cookiejar
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+MEZCLA_POR_DEFECTO = 'busqueda=60,venta=25,compra=10,reporte=4,exportar=1'
+OPERACIONES = ('busqueda', 'venta', 'compra', 'reporte', 'exportar')
+
+# Filas de lista_productos.html: id del producto, nombre y stock.
+PATRON_FILA = re.compile(
+    r'<tr id="producto-(\d+)"[^>]*>\s*'
+    r'<td class="celda-nombre[^"]*">([^<]*)</td>\s*'
+    r'<td class="celda-stock[^"]*">(\d+)</td>'
+)
+
+
+class _SinRedireccion(urllib.request.HTTPRedirectHandler):
+    # Las vistas responden 302 cuando un POST se guarda y 200 cuando el formulario
+    # se rechaza, así que hay que ver la respuesta original.
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class ClienteHttp:
+    """Un usuario simulado: su propia sesión de cookies y su token CSRF."""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _SinRedireccion
+        )
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return None
+
+    def get(self, ruta, params=None):
+        url = self.base_url + ruta
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        return self._abrir(urllib.request.Request(url))
+
+    def post(self, ruta, datos):
+        if self.csrf_token() is None:
+            self.get('/')
+        datos = dict(datos, csrfmiddlewaretoken=self.csrf_token())
+        peticion = urllib.request.Request(
+            self.base_url + ruta,
+            data=urllib.parse.urlencode(datos).encode(),
+            headers={'Referer': self.base_url + ruta},
+        )
+        return self._abrir(peticion)
+
+    def _abrir(self, peticion):
+        try:
+            with self.opener.open(peticion, timeout=self.timeout) as respuesta:
+                return respuesta.status, respuesta.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+def _percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, int(round(p / 100 * len(valores_ordenados))) - 1)
+    return valores_ordenados[min(indice, len(valores_ordenados) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga: simula cajas y usuarios de oficina concurrentes contra un servidor en "
+        "marcha, usando las mismas rutas que el navegador. Crea productos propios para la prueba, "
+        "y al final compara su stock con el esperado según las compras y ventas aceptadas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="URL base del servidor.")
+        parser.add_argument('--usuarios', type=int, default=20, help="Usuarios concurrentes.")
+        parser.add_argument('--duracion', type=float, default=30, help="Segundos de carga.")
+        parser.add_argument(
+            '--mezcla', default=MEZCLA_POR_DEFECTO,
+            help=f"Pesos por operación ({', '.join(OPERACIONES)}). Por defecto: {MEZCLA_POR_DEFECTO}"
+        )
+        parser.add_argument('--productos', type=int, default=20, help="Productos creados para la prueba.")
+        parser.add_argument('--stock-inicial', type=int, default=100_000, help="Stock inicial de cada producto.")
+        parser.add_argument('--timeout', type=float, default=30, help="Timeout por petición, en segundos.")
+        parser.add_argument('--semilla', type=int, default=None, help="Semilla para repetir la misma secuencia.")
+        parser.add_argument(
+            '--conservar-datos', action='store_true',
+            help="No elimina los productos de prueba (ni sus ventas y compras) al terminar."
+        )
+
+    def handle(self, *args, **options):
+        mezcla = self._parsear_mezcla(options['mezcla'])
+        if options['usuarios'] < 1 or options['productos'] < 1:
+            raise CommandError("--usuarios y --productos deben ser mayores que 0.")
+
+        self.base_url = options['url']
+        self.timeout = options['timeout']
+        prefijo = f"carga-{uuid.uuid4().hex[:8]}-"
+
+        admin = ClienteHttp(self.base_url, self.timeout)
+        try:
+            admin.get('/')
+        except (OSError, http.client.HTTPException) as e:
+            raise CommandError(f"No se pudo conectar a {self.base_url}: {e}")
+
+        detener = threading.Event()
+        try:
+            self._correr(admin, options, mezcla, prefijo, detener)
+        finally:
+            # También tras Ctrl-C o un error: los usuarios se detienen y se borran los
+            # productos de prueba que alcanzaron a crearse, con sus ventas y compras.
+            detener.set()
+            if not options['conservar_datos']:
+                self._limpiar(admin, prefijo)
+
+    def _correr(self, admin, options, mezcla, prefijo, detener):
+        self.stdout.write(f"Creando {options['productos']} productos '{prefijo}*'...")
+        for i in range(options['productos']):
+            estado, _ = admin.post('/', {
+                'form_type': 'inventario',
+                'nuevo_producto_nombre': f"{prefijo}{i:04d}",
+                'precio_venta': 1000,
+                'cantidad': options['stock_inicial'],
+                'costo_total': options['stock_inicial'] * 500,
+            })
+            if estado != 302:
+                raise CommandError(f"No se pudo crear el producto de prueba (HTTP {estado}).")
+        stock_inicial = self._leer_stock(admin, prefijo)
+        if len(stock_inicial) != options['productos']:
+            raise CommandError("No se encontraron todos los productos de prueba en la lista.")
+        productos = sorted(stock_inicial)
+
+        self.stdout.write(
+            f"Carga: {options['usuarios']} usuarios durante {options['duracion']}s contra {self.base_url}"
+        )
+        semilla = options['semilla'] if options['semilla'] is not None else random.randrange(2 ** 32)
+        fin = time.monotonic() + options['duracion']
+        resultados = [None] * options['usuarios']
+        hilos = [
+            threading.Thread(
+                target=self._usuario,
+                args=(n, resultados, mezcla, productos, prefijo, fin, detener, random.Random(semilla + n)),
+                daemon=True,
+            )
+            for n in range(options['usuarios'])
+        ]
+        inicio = time.monotonic()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion_real = time.monotonic() - inicio
+
+        stock_final = self._leer_stock(admin, prefijo)
+        self._reportar(resultados, duracion_real, stock_inicial, stock_final)
+
+    def _limpiar(self, admin, prefijo):
+        try:
+            productos = self._leer_stock(admin, prefijo)
+            for producto_id in productos:
+                admin.post(f'/producto/eliminar/{producto_id}/', {})
+        except (OSError, http.client.HTTPException, CommandError) as e:
+            self.stderr.write(f"No se pudieron borrar los productos '{prefijo}*': {e}")
+
+    def _parsear_mezcla(self, texto):
+        mezcla = {}
+        for parte in texto.split(','):
+            nombre, _, peso = parte.partition('=')
+            nombre = nombre.strip()
+            if nombre not in OPERACIONES:
+                raise CommandError(f"Operación desconocida en --mezcla: '{nombre}'.")
+            try:
+                mezcla[nombre] = float(peso)
+            except ValueError:
+                raise CommandError(f"Peso inválido para '{nombre}' en --mezcla.")
+            if mezcla[nombre] < 0:
+                raise CommandError(f"El peso de '{nombre}' en --mezcla no puede ser negativo.")
+        if sum(mezcla.values()) <= 0:
+            raise CommandError("--mezcla debe tener al menos un peso positivo.")
+        return mezcla
+
+    def _leer_stock(self, cliente, prefijo):
+        stock = {}
+        pagina = 1
+        while True:
+            estado, cuerpo = cliente.get('/', {'q': prefijo, 'page': pagina})
+            if estado != 200:
+                raise CommandError(f"No se pudo leer la lista de productos (HTTP {estado}).")
+            filas = PATRON_FILA.findall(cuerpo.decode(errors='replace'))
+            nuevas = {int(pk): int(s) for pk, nombre, s in filas if int(pk) not in stock}
+            if not nuevas:
+                return stock
+            stock.update(nuevas)
+            pagina += 1
+
+    def _usuario(self, n, resultados, mezcla, productos, prefijo, fin, detener, rnd):
+        cliente = ClienteHttp(self.base_url, self.timeout)
+        operaciones = list(mezcla)
+        pesos = [mezcla[op] for op in operaciones]
+        muestras = []
+        movimientos = defaultdict(int)
+        unidades = 0
+
+        try:
+            while time.monotonic() < fin and not detener.is_set():
+                operacion = rnd.choices(operaciones, pesos)[0]
+                producto_id = rnd.choice(productos)
+                cantidad = rnd.randint(1, 3)
+
+                inicio = time.monotonic()
+                try:
+                    if operacion == 'busqueda':
+                        estado, _ = cliente.get('/', {
+                            'q': prefijo[:rnd.randint(1, len(prefijo))],
+                            'filtro_stock': rnd.choice(['', 'en_stock', 'poco_stock', 'agotado']),
+                            'page': rnd.randint(1, 3),
+                        })
+                    elif operacion == 'venta':
+                        estado, _ = cliente.post('/', {
+                            'form_type': 'venta', 'producto': producto_id,
+                            'cantidad': cantidad, 'cliente': 'prueba de carga',
+                        })
+                    elif operacion == 'compra':
+                        estado, _ = cliente.post('/', {
+                            'form_type': 'inventario', 'producto_existente': producto_id,
+                            'cantidad': cantidad, 'costo_total': cantidad * 500,
+                        })
+                    elif operacion == 'reporte':
+                        estado, _ = cliente.get(rnd.choice(['/reporte/', '/historial/compras/']))
+                    else:
+                        estado, _ = cliente.get('/exportar/excel/')
+                except (OSError, http.client.HTTPException):
+                    estado = None
+                latencia = time.monotonic() - inicio
+
+                if estado is None or estado >= 400:
+                    resultado = 'error'
+                elif operacion in ('venta', 'compra'):
+                    # 302 = guardado; 200 = el formulario se volvió a mostrar con errores.
+                    resultado = 'ok' if estado == 302 else 'rechazada'
+                else:
+                    resultado = 'ok' if estado == 200 else 'error'
+
+                if resultado == 'ok' and operacion == 'venta':
+                    movimientos[producto_id] -= cantidad
+                elif resultado == 'ok' and operacion == 'compra':
+                    movimientos[producto_id] += cantidad
+                if resultado == 'ok' and operacion in ('venta', 'compra'):
+                    unidades += cantidad
+                muestras.append((operacion, latencia, resultado))
+        finally:
+            # Lo medido hasta un fallo inesperado del hilo se reporta igual.
+            resultados[n] = (muestras, movimientos, unidades)
+
+    def _reportar(self, resultados, duracion, stock_inicial, stock_final):
+        por_operacion = defaultdict(list)
+        conteo = defaultdict(lambda: defaultdict(int))
+        esperado = dict(stock_inicial)
+        unidades_movidas = 0
+        for muestras, movimientos, unidades in filter(None, resultados):
+            for operacion, latencia, resultado in muestras:
+                por_operacion[operacion].append(latencia)
+                conteo[operacion][resultado] += 1
+            for producto_id, delta in movimientos.items():
+                esperado[producto_id] += delta
+            unidades_movidas += unidades
+
+        todas = sorted(lat for lats in por_operacion.values() for lat in lats)
+        total = len(todas)
+        errores = sum(c['error'] for c in conteo.values())
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'operación':<10} {'total':>7} {'ok':>7} {'rechaz.':>7} {'error':>6} "
+            f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'máx ms':>8}"
+        )
+        for operacion in OPERACIONES:
+            if operacion not in por_operacion:
+                continue
+            lats = sorted(por_operacion[operacion])
+            c = conteo[operacion]
+            self.stdout.write(
+                f"{operacion:<10} {len(lats):>7} {c['ok']:>7} {c['rechazada']:>7} {c['error']:>6} "
+                f"{_percentil(lats, 50) * 1000:>8.1f} {_percentil(lats, 90) * 1000:>8.1f} "
+                f"{_percentil(lats, 99) * 1000:>8.1f} {lats[-1] * 1000:>8.1f}"
+            )
+
+        self.stdout.write("")
+        self.stdout.write(f"Peticiones: {total} en {duracion:.1f}s ({total / duracion:.1f} req/s)")
+        if total:
+            self.stdout.write(
+                f"Latencia global: p50 {_percentil(todas, 50) * 1000:.1f} ms, "
+                f"p90 {_percentil(todas, 90) * 1000:.1f} ms, p99 {_percentil(todas, 99) * 1000:.1f} ms"
+            )
+            self.stdout.write(f"Tasa de error: {errores / total:.2%}")
+
+        # Cada compra o venta aceptada debería verse en el stock final; lo que falte o sobre
+        # son actualizaciones que otra petición concurrente pisó. Solo se ve la diferencia
+        # neta por producto: una compra y una venta perdidas de igual cantidad se anulan, así
+        # que el conteo es un mínimo.
+        inconsistentes = {
+            pk: (esperado[pk], stock_final.get(pk))
+            for pk in esperado if stock_final.get(pk) != esperado[pk]
+        }
+        unidades_perdidas = sum(
+            abs(real - esp) for esp, real in inconsistentes.values() if real is not None
+        )
+        self.stdout.write(
+            f"Actualizaciones perdidas (mínimo): {unidades_perdidas} de {unidades_movidas} unidades "
+            f"(al menos {unidades_perdidas / unidades_movidas if unidades_movidas else 0:.2%})"
+        )
+        if inconsistentes:
+            self.stdout.write(self.style.ERROR(
+                f"Stock inconsistente en {len(inconsistentes)} de {len(esperado)} productos:"
+            ))
+            for pk, (esp, real) in sorted(inconsistentes.items())[:10]:
+                self.stdout.write(f"  producto {pk}: esperado {esp}, final {real}")
+        else:
+            self.stdout.write(self.style.SUCCESS("Stock final consistente en todos los productos de prueba."))
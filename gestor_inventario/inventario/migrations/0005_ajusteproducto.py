@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0004_alter_compra_costo_total_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AjusteProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lote', models.UUIDField(db_index=True)),
+                ('fecha_ajuste', models.DateTimeField(default=django.utils.timezone.now)),
+                ('nombre_anterior', models.CharField(max_length=100)),
+                ('nombre_nuevo', models.CharField(max_length=100)),
+                ('precio_venta_anterior', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('precio_venta_nuevo', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('stock_anterior', models.PositiveIntegerField()),
+                ('stock_nuevo', models.PositiveIntegerField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ajustes', to='inventario.producto')),
+            ],
+        ),
+    ]
@@ -41,3 +41,18 @@ class Venta(models.Model):
 
     def __str__(self):
         return f"Venta {self.producto.nombre} ({self.cantidad})"
+
+
+class AjusteProducto(models.Model):
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='ajustes')
+    lote = models.UUIDField(db_index=True)
+    fecha_ajuste = models.DateTimeField(default=timezone.now)
+    nombre_anterior = models.CharField(max_length=100)
+    nombre_nuevo = models.CharField(max_length=100)
+    precio_venta_anterior = models.DecimalField(max_digits=10, decimal_places=2)
+    precio_venta_nuevo = models.DecimalField(max_digits=10, decimal_places=2)
+    stock_anterior = models.PositiveIntegerField()
+    stock_nuevo = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"Ajuste {self.nombre_nuevo} ({self.fecha_ajuste:%Y-%m-%d})"
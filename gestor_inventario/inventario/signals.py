@@ -0,0 +1,25 @@
+# inventario/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .eventos import canal_productos
+from .models import Producto
+
+
+@receiver(post_save, sender=Producto)
+def publicar_producto_guardado(sender, instance, **kwargs):
+    datos = {
+        'id': instance.pk,
+        'nombre': instance.nombre,
+        'stock': instance.stock,
+        'precio_compra': instance.precio_compra,
+        'precio_venta': instance.precio_venta,
+    }
+    transaction.on_commit(lambda: canal_productos.publicar('producto', datos))
+
+
+@receiver(post_delete, sender=Producto)
+def publicar_producto_eliminado(sender, instance, **kwargs):
+    datos = {'id': instance.pk}
+    transaction.on_commit(lambda: canal_productos.publicar('eliminado', datos))
@@ -1,3 +1,235 @@
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import pyarrow.parquet as pq
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
+from django.urls import reverse
+
+from .management.commands.exportar_columnar import Command as ExportarColumnar
+from .models import Producto, Venta, AjusteProducto
+
+
+class ActualizacionMasivaArchivoTests(TestCase):
+    def setUp(self):
+        self.url = reverse('actualizacion_masiva')
+        self.polera = Producto.objects.create(nombre='Polera', precio_venta=Decimal('1000'), stock=5)
+        self.pulsera = Producto.objects.create(nombre='Pulsera', precio_venta=Decimal('500'), stock=2)
+
+    def subir(self, contenido):
+        archivo = SimpleUploadedFile('productos.csv', contenido.encode(), content_type='text/csv')
+        return self.client.post(self.url, {'archivo': archivo})
+
+    def test_filas_por_id(self):
+        response = self.subir(f"id,precio_venta,stock\n{self.polera.pk},1200.50,7\n")
+
+        self.assertEqual(response.context['resultado']['actualizados'], 1)
+        self.polera.refresh_from_db()
+        self.assertEqual(self.polera.precio_venta, Decimal('1200.50'))
+        self.assertEqual(self.polera.stock, 7)
+
+        ajuste = AjusteProducto.objects.get()
+        self.assertEqual(ajuste.producto, self.polera)
+        self.assertEqual(ajuste.lote, response.context['resultado']['lote'])
+        self.assertEqual(ajuste.precio_venta_anterior, Decimal('1000'))
+        self.assertEqual(ajuste.precio_venta_nuevo, Decimal('1200.50'))
+        self.assertEqual((ajuste.stock_anterior, ajuste.stock_nuevo), (5, 7))
+        self.assertEqual((ajuste.nombre_anterior, ajuste.nombre_nuevo), ('Polera', 'Polera'))
+
+    def test_filas_por_nombre_con_renombre(self):
+        self.subir("nombre,nuevo_nombre,stock\nPulsera,Pulsera Plata,\n")
+
+        self.pulsera.refresh_from_db()
+        self.assertEqual(self.pulsera.nombre, 'Pulsera Plata')
+        self.assertEqual(self.pulsera.stock, 2)
+        self.assertEqual(self.pulsera.precio_venta, Decimal('500'))
+
+        ajuste = AjusteProducto.objects.get()
+        self.assertEqual((ajuste.nombre_anterior, ajuste.nombre_nuevo), ('Pulsera', 'Pulsera Plata'))
+
+    def test_filas_no_encontradas(self):
+        response = self.subir(f"id,nombre,stock\n{self.polera.pk},,1\n9999,,1\n,Inexistente,1\n")
+
+        resultado = response.context['resultado']
+        self.assertEqual(resultado['actualizados'], 1)
+        self.assertEqual(resultado['no_encontrados'], [9999, 'Inexistente'])
+        self.assertEqual(AjusteProducto.objects.count(), 1)
+
+    def test_filas_repetidas_parten_del_valor_anterior(self):
+        self.subir(
+            "id,nombre,precio_venta,stock\n"
+            f"{self.polera.pk},,1500,\n"
+            ",Polera,,9\n"
+        )
+
+        self.polera.refresh_from_db()
+        self.assertEqual(self.polera.precio_venta, Decimal('1500'))
+        self.assertEqual(self.polera.stock, 9)
+
+        primero, segundo = AjusteProducto.objects.order_by('id')
+        self.assertEqual((primero.precio_venta_anterior, primero.precio_venta_nuevo), (Decimal('1000'), Decimal('1500')))
+        self.assertEqual((segundo.precio_venta_anterior, segundo.precio_venta_nuevo), (Decimal('1500'), Decimal('1500')))
+        self.assertEqual((segundo.stock_anterior, segundo.stock_nuevo), (5, 9))
+
+    def test_conflicto_de_nombres_revierte_todo(self):
+        response = self.subir(
+            "id,nuevo_nombre,stock\n"
+            f"{self.polera.pk},,50\n"
+            f"{self.pulsera.pk},Polera,\n"
+        )
+
+        self.assertIsNone(response.context['resultado'])
+        self.assertTrue(response.context['form'].non_field_errors())
+        self.polera.refresh_from_db()
+        self.pulsera.refresh_from_db()
+        self.assertEqual(self.polera.stock, 5)
+        self.assertEqual(self.pulsera.nombre, 'Pulsera')
+        self.assertFalse(AjusteProducto.objects.exists())
+
+    def test_valores_invalidos(self):
+        response = self.subir(f"id,stock\n{self.polera.pk},-1\n")
+
+        self.assertIn('archivo', response.context['form'].errors)
+        self.assertFalse(AjusteProducto.objects.exists())
+
+
+class ActualizacionMasivaPorcentajeTests(TestCase):
+    def setUp(self):
+        self.url = reverse('actualizacion_masiva')
+        self.polera = Producto.objects.create(nombre='Polera Negra', precio_venta=Decimal('999.99'), stock=3)
+        self.poleron = Producto.objects.create(nombre='Polerón', precio_venta=Decimal('33.33'), stock=0)
+        self.pulsera = Producto.objects.create(nombre='Pulsera', precio_venta=Decimal('500'), stock=8)
+
+    def test_redondeo_a_dos_decimales(self):
+        self.client.post(self.url, {'porcentaje': '-7.5', 'busqueda': 'Negra'})
+        self.client.post(self.url, {'porcentaje': '10', 'busqueda': 'Polerón'})
+
+        self.polera.refresh_from_db()
+        self.poleron.refresh_from_db()
+        self.assertEqual(self.polera.precio_venta, Decimal('924.99'))
+        self.assertEqual(self.poleron.precio_venta, Decimal('36.66'))
+
+    def test_busqueda_filtra_productos(self):
+        response = self.client.post(self.url, {'porcentaje': '5', 'busqueda': 'poler'})
+
+        self.assertEqual(response.context['resultado']['actualizados'], 2)
+        self.pulsera.refresh_from_db()
+        self.assertEqual(self.pulsera.precio_venta, Decimal('500'))
+
+    def test_ajustes_por_lote(self):
+        primero = self.client.post(self.url, {'porcentaje': '10', 'busqueda': 'Pulsera'}).context['resultado']
+        segundo = self.client.post(self.url, {'porcentaje': '10'}).context['resultado']
+
+        self.assertEqual(AjusteProducto.objects.filter(lote=primero['lote']).count(), 1)
+        self.assertEqual(AjusteProducto.objects.filter(lote=segundo['lote']).count(), 3)
+
+        ajuste = AjusteProducto.objects.get(lote=segundo['lote'], producto=self.pulsera)
+        self.assertEqual(ajuste.nombre_anterior, 'Pulsera')
+        self.assertEqual(ajuste.nombre_nuevo, 'Pulsera')
+        self.assertEqual(ajuste.precio_venta_anterior, Decimal('550'))
+        self.assertEqual(ajuste.precio_venta_nuevo, Decimal('605'))
+        self.assertEqual((ajuste.stock_anterior, ajuste.stock_nuevo), (8, 8))
+
+    def test_rechaza_precios_fuera_de_rango(self):
+        Producto.objects.create(nombre='Caro', precio_venta=Decimal('60000000'))
+
+        response = self.client.post(self.url, {'porcentaje': '100'})
+
+        self.assertIn('porcentaje', response.context['form'].errors)
+        self.assertFalse(AjusteProducto.objects.exists())
+        self.pulsera.refresh_from_db()
+        self.assertEqual(self.pulsera.precio_venta, Decimal('500'))
+
+
+class ExportarColumnarTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.destino = Path(directorio.name)
+        self.producto = Producto.objects.create(nombre='Polera', precio_venta=Decimal('1000'), stock=50)
+        self.ventas = [self.vender() for _ in range(2)]
+
+    def vender(self):
+        return Venta.objects.create(producto=self.producto, cantidad=1)
+
+    def exportar(self, *args):
+        call_command('exportar_columnar', str(self.destino), *args, stdout=StringIO())
+
+    def partes(self):
+        return sorted(archivo.name for archivo in (self.destino / 'ventas').iterdir())
+
+    def ids_exportados(self):
+        return sorted(pq.read_table(self.destino / 'ventas').column('id').to_pylist())
+
+    def test_segunda_corrida_solo_escribe_filas_nuevas(self):
+        self.exportar()
+        nueva = self.vender()
+        self.exportar()
+
+        parte_nueva = f"ventas-{self.ventas[-1].pk + 1:012d}-{nueva.pk:012d}.parquet"
+        self.assertEqual(len(self.partes()), 2)
+        self.assertIn(parte_nueva, self.partes())
+        self.assertEqual(pq.read_table(self.destino / 'ventas' / parte_nueva).column('id').to_pylist(), [nueva.pk])
+        self.assertEqual(self.ids_exportados(), [v.pk for v in self.ventas] + [nueva.pk])
+
+    def test_venta_editada_tras_la_marca_de_agua(self):
+        self.exportar()
+        Venta.objects.filter(pk=self.ventas[0].pk).update(total_venta=Decimal('1'))
+
+        with self.assertRaises(CommandError):
+            self.exportar()
+
+    def test_venta_eliminada_tras_la_marca_de_agua(self):
+        self.exportar()
+        self.ventas[0].delete()
+
+        with self.assertRaises(CommandError):
+            self.exportar()
+
+    def test_completo_reemplaza_todas_las_partes(self):
+        self.exportar()
+        self.vender()
+        self.exportar()
+        Venta.objects.filter(pk=self.ventas[0].pk).update(total_venta=Decimal('1'))
+
+        self.exportar('--completo')
+
+        self.assertEqual(len(self.partes()), 1)
+        tabla = pq.read_table(self.destino / 'ventas')
+        self.assertEqual(tabla.num_rows, 3)
+        self.assertIn(Decimal('1'), tabla.column('total_venta').to_pylist())
+
+    def test_parte_sobre_la_marca_de_agua_se_borra(self):
+        self.exportar()
+        huerfana = self.destino / 'ventas' / f"ventas-{self.ventas[-1].pk + 1:012d}-000000000099.parquet"
+        huerfana.write_bytes(b'restos de una corrida cortada')
+        nueva = self.vender()
+
+        self.exportar()
+
+        self.assertNotIn(huerfana.name, self.partes())
+        self.assertEqual(self.ids_exportados(), [v.pk for v in self.ventas] + [nueva.pk])
+
+    def test_escritura_fallida_no_deja_archivos_legibles(self):
+        self.exportar()
+        partes = self.partes()
+        self.vender()
+        a_batch = ExportarColumnar._a_batch
+
+        def fallar_en_ventas(lote, nombres, esquema):
+            if 'ganancia' in nombres:
+                raise RuntimeError('disco lleno')
+            return a_batch(lote, nombres, esquema)
+
+        with mock.patch.object(ExportarColumnar, '_a_batch', side_effect=fallar_en_ventas):
+            with self.assertRaises(RuntimeError):
+                self.exportar()
+
+        self.assertEqual(self.partes(), partes)
+        self.assertEqual(self.ids_exportados(), [v.pk for v in self.ventas])
 
-# Create your tests here.
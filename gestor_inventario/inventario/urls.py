@@ -10,6 +10,8 @@ urlpatterns = [
     path('historial/compras/', views.historial_compras, name='historial_compras'),
     path('exportar/excel/', views.exportar_excel, name='exportar_excel'),
     path('pedidos/seguimiento/', views.seguimiento_pedidos, name='seguimiento_pedidos'),
+    path('productos/actualizacion-masiva/', views.actualizacion_masiva, name='actualizacion_masiva'),
+    path('productos/eventos/', views.eventos_productos, name='eventos_productos'),
     
     
 ]
\ No newline at end of file
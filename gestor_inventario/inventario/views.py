@@ -1,14 +1,24 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Sum, Q
+from django.db import connection, transaction, IntegrityError, DataError
+from django.db.models import Sum, Q, F, Max, Value, DecimalField, DateTimeField, UUIDField
+from django.db.models.functions import Round
 from django.utils import timezone
 from datetime import datetime
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
-from django.http import HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
 import pandas as pd
+import asyncio
 import io
-from .models import Producto, Venta, Compra
-from .forms import RegistroInventarioForm, ProductoEditForm, VentaForm
+import uuid
+from .eventos import canal_productos
+from .models import Producto, Venta, Compra, AjusteProducto
+from .forms import RegistroInventarioForm, ProductoEditForm, VentaForm, ActualizacionMasivaForm, PRECIO_MAXIMO
+
+
+TAMANO_LOTE_MASIVO = 500
 
 
 def lista_productos(request):
@@ -108,7 +118,8 @@ def lista_productos(request):
         'venta_form': venta_form,
         'edit_form': edit_form,
         'search_query': search_query,
-        'filtro_stock': filtro_stock
+        'filtro_stock': filtro_stock,
+        'eventos_en_vivo': isinstance(request, ASGIRequest),
     })
 
 
@@ -252,3 +263,208 @@ def exportar_excel(request):
 
 def seguimiento_pedidos(request):
     return render(request, 'inventario/seguimiento_pedidos.html', {})
+
+
+
+# ================== ACTUALIZACIÓN MASIVA ==================
+
+# bulk_update() genera un CASE WHEN por campo y por fila, y bulk_create() instancia un
+# modelo por fila: con 100k productos eso tarda minutos. Aquí se usa executemany() para
+# los archivos y UPDATE / INSERT ... SELECT sobre la base de datos para las reglas.
+def _tabla_y_columnas(modelo, campos):
+    qn = connection.ops.quote_name
+    columnas = ', '.join(qn(modelo._meta.get_field(campo).column) for campo in campos)
+    return qn(modelo._meta.db_table), columnas
+
+
+COLUMNAS_AJUSTE = [
+    'producto', 'lote', 'fecha_ajuste',
+    'nombre_anterior', 'nombre_nuevo',
+    'precio_venta_anterior', 'precio_venta_nuevo',
+    'stock_anterior', 'stock_nuevo',
+]
+
+
+def _aplicar_filas(filas, lote):
+    qn = connection.ops.quote_name
+    tabla_producto = qn(Producto._meta.db_table)
+    tabla_ajuste, columnas_ajuste = _tabla_y_columnas(AjusteProducto, COLUMNAS_AJUSTE)
+    sql_update = (
+        f"UPDATE {tabla_producto} SET {qn('nombre')} = %s, {qn('precio_venta')} = %s, {qn('stock')} = %s "
+        f"WHERE {qn('id')} = %s"
+    )
+    sql_insert = (
+        f"INSERT INTO {tabla_ajuste} ({columnas_ajuste}) "
+        f"VALUES ({', '.join(['%s'] * len(COLUMNAS_AJUSTE))})"
+    )
+
+    campo_precio = Producto._meta.get_field('precio_venta')
+    lote_db = AjusteProducto._meta.get_field('lote').get_db_prep_save(lote, connection)
+    fecha_db = AjusteProducto._meta.get_field('fecha_ajuste').get_db_prep_save(timezone.now(), connection)
+
+    actualizados = set()
+    no_encontrados = []
+
+    for inicio in range(0, len(filas), TAMANO_LOTE_MASIVO):
+        tramo = filas[inicio:inicio + TAMANO_LOTE_MASIVO]
+        # Una sola lista por producto, la use la fila por id o por nombre, para que
+        # las filas repetidas partan siempre del estado que dejó la anterior.
+        encontrados = Producto.objects.filter(
+            Q(pk__in=[f['id'] for f in tramo if f['id']])
+            | Q(nombre__in=[f['nombre'] for f in tramo if not f['id']])
+        ).values_list('pk', 'nombre', 'precio_venta', 'stock')
+        por_id = {fila[0]: list(fila) for fila in encontrados}
+        por_nombre = {actual[1]: actual for actual in por_id.values()}
+
+        params_update = []
+        params_insert = []
+        for fila in tramo:
+            if fila['id']:
+                actual = por_id.get(fila['id'])
+            else:
+                actual = por_nombre.get(fila['nombre'])
+            if actual is None:
+                no_encontrados.append(fila['id'] or fila['nombre'])
+                continue
+
+            pk, nombre, precio_venta, stock = actual
+            nuevo_nombre = fila['nuevo_nombre'] if fila['nuevo_nombre'] is not None else nombre
+            nuevo_precio = fila['precio_venta'] if fila['precio_venta'] is not None else precio_venta
+            nuevo_stock = fila['stock'] if fila['stock'] is not None else stock
+            # Si el producto se repite en el archivo, la siguiente fila parte de estos valores.
+            actual[1:] = [nuevo_nombre, nuevo_precio, nuevo_stock]
+
+            precio_db = campo_precio.get_db_prep_save(precio_venta, connection)
+            nuevo_precio_db = campo_precio.get_db_prep_save(nuevo_precio, connection)
+            params_update.append((nuevo_nombre, nuevo_precio_db, nuevo_stock, pk))
+            params_insert.append((
+                pk, lote_db, fecha_db,
+                nombre, nuevo_nombre,
+                precio_db, nuevo_precio_db,
+                stock, nuevo_stock,
+            ))
+            actualizados.add(pk)
+
+        with connection.cursor() as cursor:
+            cursor.executemany(sql_update, params_update)
+            cursor.executemany(sql_insert, params_insert)
+
+    return {'actualizados': len(actualizados), 'no_encontrados': no_encontrados}
+
+
+def _aplicar_porcentaje(queryset, porcentaje, lote):
+    factor = Decimal('1') + porcentaje / Decimal('100')
+    nuevo_precio = Round(
+        F('precio_venta') * Value(factor, output_field=DecimalField()), 2,
+        output_field=DecimalField(max_digits=10, decimal_places=2)
+    )
+    tabla_ajuste, columnas_ajuste = _tabla_y_columnas(AjusteProducto, COLUMNAS_AJUSTE)
+
+    # SQLite no valida max_digits al escribir: un precio desbordado se guardaría y luego
+    # fallaría cada lectura del producto. Se revisa antes de tocar nada.
+    precio_maximo = queryset.aggregate(maximo=Max('precio_venta'))['maximo']
+    if precio_maximo is not None:
+        resultante = (precio_maximo * factor).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        if resultante >= PRECIO_MAXIMO:
+            raise ValidationError(
+                f"Con esta variación algún precio llegaría a ${resultante:.0f}; "
+                f"el máximo permitido es ${PRECIO_MAXIMO - Decimal('0.01'):.2f}."
+            )
+
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+
+    for inicio in range(0, len(ids), TAMANO_LOTE_MASIVO):
+        tramo_ids = ids[inicio:inicio + TAMANO_LOTE_MASIVO]
+        tramo = queryset.filter(pk__gte=tramo_ids[0], pk__lte=tramo_ids[-1])
+
+        # El ajuste se escribe antes del UPDATE, con la misma expresión para el precio nuevo.
+        seleccion = tramo.order_by().annotate(
+            ajuste_lote=Value(lote, output_field=UUIDField()),
+            ajuste_fecha=Value(timezone.now(), output_field=DateTimeField()),
+            ajuste_nombre=F('nombre'),
+            ajuste_precio=nuevo_precio,
+            ajuste_stock=F('stock'),
+        ).values_list(
+            'pk', 'ajuste_lote', 'ajuste_fecha',
+            'nombre', 'ajuste_nombre',
+            'precio_venta', 'ajuste_precio',
+            'stock', 'ajuste_stock',
+        )
+        sql, params = seleccion.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {tabla_ajuste} ({columnas_ajuste}) {sql}", params)
+
+        tramo.update(precio_venta=nuevo_precio)
+
+    return {'actualizados': len(ids), 'no_encontrados': []}
+
+
+def actualizacion_masiva(request):
+    form = ActualizacionMasivaForm()
+    resultado = None
+
+    if request.method == 'POST':
+        form = ActualizacionMasivaForm(request.POST, request.FILES)
+        if form.is_valid():
+            cd = form.cleaned_data
+            lote = uuid.uuid4()
+            try:
+                with transaction.atomic():
+                    if cd.get('archivo'):
+                        resultado = _aplicar_filas(cd['filas'], lote)
+                    else:
+                        queryset = Producto.objects.all()
+                        if cd.get('busqueda'):
+                            queryset = queryset.filter(nombre__icontains=cd['busqueda'])
+                        resultado = _aplicar_porcentaje(queryset, cd['porcentaje'], lote)
+                    # Los cambios masivos no pasan por save(): se pide a las pantallas abiertas recargar.
+                    transaction.on_commit(lambda: canal_productos.publicar('recargar'))
+            except ValidationError as e:
+                resultado = None
+                form.add_error('porcentaje', e)
+            except IntegrityError:
+                resultado = None
+                form.add_error(None, "Hay nombres repetidos: dos productos no pueden quedar con el mismo nombre.")
+            except DataError:
+                resultado = None
+                form.add_error(None, "Algún precio resultante es demasiado grande.")
+            else:
+                resultado['lote'] = lote
+
+    ajustes = AjusteProducto.objects.order_by('-fecha_ajuste', '-id')[:50]
+
+    return render(request, 'inventario/actualizacion_masiva.html', {
+        'form': form,
+        'resultado': resultado,
+        'ajustes': ajustes,
+    })
+
+
+# ================== EVENTOS EN VIVO ==================
+INTERVALO_LATIDO = 15
+
+
+async def eventos_productos(request):
+    # Bajo WSGI (runserver) Django consume el stream completo antes de responder y este nunca
+    # termina. Un 204 le indica al navegador que no vuelva a intentar la conexión.
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    async def stream():
+        suscriptor = canal_productos.suscribir()
+        _, cola = suscriptor
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    mensaje = await asyncio.wait_for(cola.get(), timeout=INTERVALO_LATIDO)
+                except asyncio.TimeoutError:
+                    mensaje = ": latido\n\n"
+                yield mensaje
+        finally:
+            canal_productos.desuscribir(suscriptor)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response